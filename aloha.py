@@ -6,7 +6,6 @@ import streamlit as st
 from pathlib import Path
 from dotenv import load_dotenv
 from PIL import Image
-import re # <-- 1. re 모듈 추가
 import traceback
 import requests
 import json
@@ -203,40 +202,18 @@ with st.sidebar:
     )
 
 # ==============================================================================
-# LLM 텍스트 파싱 함수
+# 보고서 렌더링 함수 (파싱은 MCP 서버가 수행해 JSON report 로 전달)
 # ==============================================================================
-def extract_section(regex_pattern, text):
-    """유연한 정규식 매칭 (줄바꿈/공백 포함)"""
-    match = re.search(regex_pattern, text, re.DOTALL | re.IGNORECASE)
-    return match.group(1).strip() if match else "정보 없음"
-
-
-def display_revue_report(llm_output_text):
-    data = {}
-
-    # [현재 위치 파악]
-    data['traffic_light'] = extract_section(r'🚦신호등:\s*(.*?)\s*\n', llm_output_text)
-    data['good_area'] = extract_section(r'🚗 잘 가고 있는 구간\s*(.*?)\s*⚠️ 느리게 가고 있는 구간', llm_output_text)
-    data['bad_area'] = extract_section(r'⚠️ 느리게 가고 있는 구간\s*(.*?)\s*🎯한줄요약', llm_output_text)
-    data['summary'] = extract_section(r'🎯한줄요약[:：]?\s*(.*?)\s*(?:=====|\Z)', llm_output_text)
-
-    # [경로 탐색]
-    data['Enhance_line'] = extract_section(r'강화 경로 \(Enhance Line\):\s*(.*?)\s*- 보수 경로', llm_output_text)
-    data['Fix_line'] = extract_section(r'보수 경로 \(Fix Line\):\s*(.*?)\s*- 전환 경로', llm_output_text)
-    data['Shift_line'] = extract_section(r'전환 경로 \(Shift Line\):\s*(.*?)\s*===== 🏁최종 경로', llm_output_text)
-
-    # [최종 경로]
-    data['recommended_path'] = extract_section(r'추천 경로:\s*(.*?)\s*\n', llm_output_text)
-    data['strategy_name'] = extract_section(r'전략명:\s*(.*?)\s*\n', llm_output_text)
-    data['core_idea'] = extract_section(r'핵심 아이디어:\s*(.*?)\s*\n', llm_output_text)
-    data['reason'] = extract_section(r'채택 근거:\s*(.*?)\s*\n', llm_output_text)
-
-    # [운행 안내]
-    data['action_plan'] = extract_section(r'<실행 방법>\s*(.*?)\s*<기대효과>', llm_output_text)
-    data['expected_effect'] = extract_section(r'<기대효과>\s*(.*?)\s*(?:===== 🏆 도착 알림|\Z)', llm_output_text)
+REPORT_KEYS = (
+    "traffic_light", "good_area", "bad_area", "summary",        # [현재 위치 파악]
+    "Enhance_line", "Fix_line", "Shift_line",                   # [경로 탐색]
+    "recommended_path", "strategy_name", "core_idea", "reason", # [최종 경로]
+    "action_plan", "expected_effect",                           # [운행 안내]
+    "growth_phrase",                                            # [도착 알림]
+)
 
-    # [도착 알림]
-    data['growth_phrase'] = extract_section(r'🎉오늘 사장님은 [“"](.*?)[”"](으)?로 성장했습니다', llm_output_text)
+def display_revue_report(report):
+    data = {key: report.get(key) or "정보 없음" for key in REPORT_KEYS}
 
     # ===============================================
     # Streamlit UI 렌더링
@@ -343,10 +320,10 @@ if "chat_history" not in st.session_state:
 for msg in st.session_state["chat_history"]:
     if msg["role"] == "assistant":
         with st.chat_message("assistant"):
-            # 💡 응답 내용이 보고서 템플릿의 시작점("=====")을 포함하는지 확인하여 분기
-            if "===== 📍 현재 위치 파악 =====" in msg["content"]:
-                # 보고서 형식의 응답이면, 파싱 함수를 호출하여 구조화합니다.
-                display_revue_report(msg["content"])
+            # 💡 서버가 구조화된 보고서(report)를 함께 보냈는지 확인하여 분기
+            if msg.get("report"):
+                # 보고서 형식의 응답이면, 필드를 그대로 렌더링합니다.
+                display_revue_report(msg["report"])
             else:
                 # 일반 텍스트 메시지이거나 오류 메시지이면, 마크다운으로 그대로 표시합니다.
                 st.markdown(msg["content"])
@@ -363,6 +340,7 @@ if prompt := st.chat_input("가맹점 이름과 정확한 주소를 함께 질
     # AI 응답
     with st.chat_message("assistant"):
         with st.spinner("🔍 분석 중입니다..."):
+            report = None
             try:
                 # 1. 서버로 요청 보내기 (API_URL 확인용 출력 포함)
                 # st.write(f"DEBUG: {API_URL} 로 요청 보냄") # 필요하면 주석 해제해서 주소 확인
@@ -381,8 +359,9 @@ if prompt := st.chat_input("가맹점 이름과 정확한 주소를 함께 질
 
                 if "answer" in data:
                     answer = data["answer"]
-                    if "===== 📍 현재 위치 파악 =====" in answer:
-                        display_revue_report(answer)
+                    report = data.get("report")
+                    if report:
+                        display_revue_report(report)
                     else:
                         st.markdown(answer)
                 else:
@@ -401,5 +380,5 @@ if prompt := st.chat_input("가맹점 이름과 정확한 주소를 함께 질
                 
                 print(traceback.format_exc())
 
-    st.session_state["chat_history"].append({"role": "assistant", "content": answer})
+    st.session_state["chat_history"].append({"role": "assistant", "content": answer, "report": report})
     st.rerun()
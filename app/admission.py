@@ -0,0 +1,152 @@
+"""
+ReVue 요청 수용 제어 — 동시 처리 수 제한, 대기열 상한, 요청별 마감 시간(deadline)
+
+/search 요청은 슬롯(동시 처리 수)을 얻어야 실행됩니다. 빈 슬롯이 있으면 바로 실행하고,
+대기해야 하는 요청은 대기열이 가득 찼거나 예상 대기 시간 + 처리 시간이 남은 마감 시간을 넘으면
+즉시 429(Retry-After)로 거절합니다. 대기 없이도 처리 시간이 마감보다 길면 재시도해도 소용없으므로 504 입니다.
+마감 시간은 임베딩·검색·LLM 호출 단계마다 확인해 초과 시 작업을 중단합니다.
+"""
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import os
+import time
+
+MAX_CONCURRENCY = int(os.environ.get("REVUE_MAX_CONCURRENCY", 4))
+MAX_QUEUE = int(os.environ.get("REVUE_MAX_QUEUE", 16))
+DEFAULT_TIMEOUT = float(os.environ.get("REVUE_DEFAULT_TIMEOUT", 60))
+MAX_TIMEOUT = float(os.environ.get("REVUE_MAX_TIMEOUT", 120))
+
+TIMEOUT_HEADER = "X-Request-Timeout"  # 초 단위
+
+
+class DeadlineExceeded(Exception):
+    """마감 시간 초과 — stage 에 중단된 단계를 기록"""
+
+    def __init__(self, stage):
+        super().__init__(f"deadline exceeded before '{stage}'")
+        self.stage = stage
+
+
+class Overloaded(Exception):
+    """대기열 초과 또는 마감 전 처리 불가 — retry_after(초) 후 재시도 권장"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"server overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """요청 마감 시각 (time.monotonic 기준)"""
+
+    def __init__(self, timeout):
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, stage):
+        """마감이 지났으면 DeadlineExceeded 발생"""
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(stage)
+
+
+def deadline_from_request(header_value=None, body_value=None):
+    """헤더 → 본문 → 기본값 순으로 timeout 을 정해 Deadline 생성 (MAX_TIMEOUT 으로 제한)"""
+    value = header_value if header_value is not None else body_value
+    if value is None:
+        timeout = DEFAULT_TIMEOUT
+    else:
+        try:
+            timeout = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"잘못된 timeout 값: {value!r}")
+    if not timeout > 0:
+        raise ValueError("timeout 은 0보다 커야 합니다.")
+    return Deadline(min(timeout, MAX_TIMEOUT))
+
+
+class AdmissionController:
+    """asyncio 세마포어 기반 슬롯 + 대기열 상한 + 처리 시간 EWMA 로 조기 거절"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_queue=MAX_QUEUE, alpha=0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.alpha = alpha
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.service_time = None  # 초 단위 EWMA
+        # completed 는 정상 완료만, failed 는 마감 초과 외 오류
+        self.counts = {"arrived": 0, "admitted": 0, "shed": 0, "expired": 0, "failed": 0, "completed": 0}
+
+    def _estimated_wait(self):
+        if self.service_time is None:
+            return 0.0
+        return self.service_time * (self.waiting + 1) / self.max_concurrency
+
+    def _cannot_finish(self, deadline):
+        """예상 대기 시간 + 자체 처리 시간이 마감 전에 끝나지 않을 것으로 예상되는지"""
+        if self.service_time is None:
+            return False
+        return self._estimated_wait() + self.service_time > deadline.remaining()
+
+    def _shed(self):
+        self.counts["shed"] += 1
+        per_slot = self.service_time or 1.0
+        raise Overloaded(max(1, math.ceil(per_slot * (self.waiting + 1) / self.max_concurrency)))
+
+    @asynccontextmanager
+    async def slot(self, deadline):
+        """슬롯 획득 후 본문 실행 — 대기열 거절 시 Overloaded, 마감 전 처리 불가·대기 중 마감 시 DeadlineExceeded"""
+        self.counts["arrived"] += 1
+        if not self._sem.locked():
+            await self._sem.acquire()  # 빈 슬롯이 있으면 예상 시간과 무관하게 바로 실행
+        else:
+            if self.service_time is not None and self.service_time > deadline.remaining():
+                # 대기 없이도 마감 전에 끝날 수 없음 — 재시도해도 같으므로 429 가 아닌 마감 초과
+                self.counts["expired"] += 1
+                raise DeadlineExceeded("admission")
+            if self.waiting >= self.max_queue or self._cannot_finish(deadline):
+                self._shed()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), timeout=deadline.remaining())
+            except asyncio.TimeoutError:
+                self.counts["expired"] += 1
+                raise DeadlineExceeded("queue")
+            finally:
+                self.waiting -= 1
+
+        self.counts["admitted"] += 1
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+            self.counts["completed"] += 1
+        except DeadlineExceeded:
+            self.counts["expired"] += 1
+            raise
+        except Exception:
+            self.counts["failed"] += 1
+            raise
+        finally:
+            # 느린 호출 한 번에 평균이 마감 이상으로 고착되지 않도록 표본을 MAX_TIMEOUT 으로 제한
+            elapsed = min(time.monotonic() - started, MAX_TIMEOUT)
+            self.service_time = elapsed if self.service_time is None else (
+                self.alpha * elapsed + (1 - self.alpha) * self.service_time
+            )
+            self.in_flight -= 1
+            self._sem.release()
+
+    def metrics(self):
+        arrived = self.counts["arrived"]
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            **self.counts,
+            "shed_rate": self.counts["shed"] / arrived if arrived else 0.0,
+            "service_time_ewma_s": self.service_time,
+        }
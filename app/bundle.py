@@ -0,0 +1,315 @@
+"""
+ReVue 아티팩트 번들 — 모델 가중치·인덱스·메타·보조 테이블을 하나의 버전 디렉터리로 묶기
+
+사용법:
+    python bundle.py prepare --src . --out revue_bundle [--no-shards]
+
+번들 구조 (revue_bundle/<version>/):
+    manifest.json          체크섬·차원·행 수 기록
+    model/                 SentenceTransformer 가중치 (오프라인 로드용)
+    rag_faiss.index        통합 FAISS 인덱스 (--no-shards 일 때만, mmap 로드)
+    meta.pkl               meta.csv 를 파싱해 둔 DataFrame
+    ratings_mct.npy        별점 테이블 키 (ENCODED_MCT)
+    ratings_values.npy     별점 테이블 값 (g_rating, g_user_ratings_total)
+    closed_index.npy       폐점 비교 지표명
+    closed_values.npy      폐점 비교 통계값 (CLOSED_COLUMNS 순서)
+    risk_*.npy             매장·월별 폐점 위험도 (closure_risk.py)
+    shards/                구별 FAISS 샤드 + 도로명 주소 색인 (shards.py, 기본)
+revue_bundle/CURRENT 파일에 현재 사용할 버전 이름을 기록합니다.
+"""
+from pathlib import Path
+from datetime import datetime, timezone
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from closure_risk import compute_closure_risk, save_closure_risk, load_closure_risk
+from shards import build_shards, faiss_mmap_flags, ShardRouter
+
+# -------------------------------
+# 번들 설정
+# -------------------------------
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+MODEL_DIR = "model"
+INDEX_FILE = "rag_faiss.index"
+META_FILE = "meta.pkl"
+RATINGS_KEYS_FILE = "ratings_mct.npy"
+RATINGS_VALUES_FILE = "ratings_values.npy"
+CLOSED_KEYS_FILE = "closed_index.npy"
+CLOSED_VALUES_FILE = "closed_values.npy"
+
+CLOSED_COLUMNS = ["Closed_mean", "Open_mean", "Closed_median", "Open_median", "Closed_std", "Open_std"]
+
+DEFAULT_EMB_MODEL = "BAAI/bge-m3"
+
+
+class BundleError(RuntimeError):
+    """번들이 없거나 manifest 와 실제 파일이 일치하지 않을 때 발생"""
+
+
+# -------------------------------
+# 체크섬 유틸
+# -------------------------------
+def _sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_entries(root):
+    """번들 내 모든 파일(manifest 제외)의 sha256·크기 목록"""
+    root = Path(root)
+    entries = {}
+    for p in sorted(root.rglob("*")):
+        if not p.is_file() or p.name == MANIFEST_NAME:
+            continue
+        rel = p.relative_to(root).as_posix()
+        entries[rel] = {"sha256": _sha256(p), "bytes": p.stat().st_size}
+    return entries
+
+
+# -------------------------------
+# 번들 생성 (prepare)
+# -------------------------------
+def _save_ratings(src_dir, out_dir):
+    path = Path(src_dir) / "store_google_rating.csv"
+    if path.exists():
+        df = pd.read_csv(path, encoding="utf-8-sig")
+        keys = df["ENCODED_MCT"].astype(str).to_numpy(dtype="U")
+        values = df[["g_rating", "g_user_ratings_total"]].to_numpy(dtype="float64")
+    else:
+        print(f"⚠️ {path} 없음 — 빈 별점 테이블로 저장합니다.")
+        keys = np.empty(0, dtype="U1")
+        values = np.empty((0, 2), dtype="float64")
+    np.save(out_dir / RATINGS_KEYS_FILE, keys)
+    np.save(out_dir / RATINGS_VALUES_FILE, values)
+    return len(keys)
+
+
+def _save_closed(src_dir, out_dir):
+    path = Path(src_dir) / "versus_closed.csv"
+    if path.exists():
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    else:
+        print(f"⚠️ {path} 없음 — 빈 폐점 비교 테이블로 저장합니다.")
+        df = pd.DataFrame(columns=["Index"] + CLOSED_COLUMNS)
+    np.save(out_dir / CLOSED_KEYS_FILE, df["Index"].astype(str).to_numpy(dtype="U"))
+    np.save(out_dir / CLOSED_VALUES_FILE, df[CLOSED_COLUMNS].to_numpy(dtype="float64"))
+    return df
+
+
+def prepare_bundle(src_dir=".", out_root="revue_bundle", emb_model=DEFAULT_EMB_MODEL, shards=True):
+    """
+    원본 파일들을 읽어 버전 디렉터리 하나로 묶고 manifest 를 기록한 뒤 CURRENT 를 갱신
+    - shards=True 이면 구별 샤드만 저장 (같은 벡터를 통합 인덱스로 중복 저장하지 않음)
+    - shards=False 이면 통합 인덱스만 저장
+    """
+    import faiss
+    from sentence_transformers import SentenceTransformer
+
+    src_dir, out_root = Path(src_dir), Path(out_root)
+    out_root.mkdir(parents=True, exist_ok=True)
+    staging = out_root / f".staging-{os.getpid()}"
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir()
+
+    try:
+        # 1️⃣ 임베딩 모델 가중치
+        print(f"📦 임베딩 모델 저장: {emb_model}")
+        model = SentenceTransformer(emb_model, device="cpu")
+        model.save(str(staging / MODEL_DIR))
+        emb_dim = int(model.get_sentence_embedding_dimension())
+
+        # 2️⃣ FAISS 인덱스 (저장은 6️⃣ 에서 샤드 또는 통합 인덱스 중 하나로)
+        index = faiss.read_index(str(src_dir / "rag_faiss.index"))
+        if index.d != emb_dim:
+            raise BundleError(f"인덱스 차원({index.d})과 모델 차원({emb_dim})이 다릅니다.")
+
+        # 3️⃣ 메타 데이터 (CSV 파싱은 여기서 한 번만)
+        meta = pd.read_csv(src_dir / "meta.csv")
+        if len(meta) != index.ntotal:
+            raise BundleError(f"meta 행 수({len(meta)})와 인덱스 벡터 수({index.ntotal})가 다릅니다.")
+        meta.to_pickle(staging / META_FILE)
+
+        # 4️⃣ 보조 테이블
+        n_ratings = _save_ratings(src_dir, staging)
+        closed_df = _save_closed(src_dir, staging)
+
+        # 5️⃣ 폐점 위험도 사전 계산
+        risk = compute_closure_risk(meta, closed_df)
+        n_risk = save_closure_risk(risk, staging) if risk is not None else 0
+
+        # 6️⃣ 구별 샤드 인덱스 또는 통합 인덱스
+        if shards:
+            shard_rows = build_shards(index, meta, staging)
+            print(f"🗂️ 샤드 {len(shard_rows)}개 생성: {shard_rows}")
+        else:
+            faiss.write_index(index, str(staging / INDEX_FILE))
+            shard_rows = {}
+
+        files = _file_entries(staging)
+        digest = hashlib.sha256(
+            "".join(f"{k}:{v['sha256']}" for k, v in files.items()).encode()
+        ).hexdigest()
+        version = f"v{BUNDLE_FORMAT}-{digest[:12]}"
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "emb_model": emb_model,
+            "emb_dim": emb_dim,
+            "index": {"ntotal": int(index.ntotal), "dim": int(index.d)},
+            "rows": {"meta": len(meta), "ratings": n_ratings, "closed": len(closed_df), "closure_risk": n_risk},
+            "shards": shard_rows,
+            "files": files,
+        }
+        with open(staging / MANIFEST_NAME, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        target = out_root / version
+        if target.exists():
+            print(f"ℹ️ 동일한 버전 {version} 이 이미 존재합니다 — 기존 번들을 유지합니다.")
+            shutil.rmtree(staging)
+        else:
+            staging.rename(target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    (out_root / CURRENT_NAME).write_text(version + "\n", encoding="utf-8")
+    print(f"✅ 번들 준비 완료: {target}")
+    return target
+
+
+# -------------------------------
+# 번들 확인 및 로드
+# -------------------------------
+def resolve_bundle_dir(root):
+    """번들 루트(CURRENT 포함) 또는 버전 디렉터리를 받아 실제 버전 디렉터리 경로를 반환"""
+    root = Path(root)
+    if (root / MANIFEST_NAME).exists():
+        return root
+    current = root / CURRENT_NAME
+    if current.exists():
+        version_dir = root / current.read_text(encoding="utf-8").strip()
+        if (version_dir / MANIFEST_NAME).exists():
+            return version_dir
+    return None
+
+
+def enable_offline_mode():
+    """번들 사용 시 Hugging Face 네트워크 접근 차단 (transformers import 전에 호출)"""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+
+def verify_bundle(bundle_dir, mode="sha256"):
+    """manifest 의 파일 목록·크기·체크섬을 실제 파일과 대조 (mode: 'sha256' | 'size')"""
+    bundle_dir = Path(bundle_dir)
+    with open(bundle_dir / MANIFEST_NAME, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"지원하지 않는 번들 형식: {manifest.get('format')}")
+
+    for rel, entry in manifest["files"].items():
+        path = bundle_dir / rel
+        if not path.is_file():
+            raise BundleError(f"번들 파일 누락: {rel}")
+        if path.stat().st_size != entry["bytes"]:
+            raise BundleError(f"파일 크기 불일치: {rel}")
+        if mode == "sha256" and _sha256(path) != entry["sha256"]:
+            raise BundleError(f"체크섬 불일치: {rel}")
+    return manifest
+
+
+def load_bundle(bundle_dir, verify="size", use_shards=True):
+    """
+    manifest 검증 후 인덱스·배열을 mmap 으로 열어 dict 로 반환 (모델은 호출 측에서 로드)
+    - 시작 시에는 크기만 확인 (sha256 전체 검증은 빌드 시 `bundle.py verify` 에서 수행)
+    - 샤드 번들이면 ShardRouter 만 생성 (index=None), 통합 인덱스 번들이면 인덱스를 mmap
+    - use_shards=False 는 통합 인덱스가 있는 번들(--no-shards)에서만 가능
+    """
+    import faiss
+
+    bundle_dir = Path(bundle_dir)
+    manifest = verify_bundle(bundle_dir, mode=verify)
+    meta = pd.read_pickle(bundle_dir / META_FILE)
+    if len(meta) != manifest["rows"]["meta"] or len(meta) != manifest["index"]["ntotal"]:
+        raise BundleError("meta 행 수가 manifest 또는 인덱스와 다릅니다.")
+
+    index, shards = None, None
+    has_index = INDEX_FILE in manifest["files"]
+    if manifest.get("shards") and (use_shards or not has_index):
+        if not use_shards:
+            print("⚠️ 통합 인덱스가 없는 샤드 번들입니다 — 샤드 검색을 사용합니다. (--no-shards 로 다시 생성 가능)")
+        if sum(manifest["shards"].values()) != len(meta):
+            raise BundleError("샤드 행 수 합계가 meta 행 수와 다릅니다.")
+        shards = ShardRouter(bundle_dir)
+    elif not has_index:
+        raise BundleError("번들에 검색 인덱스(샤드 또는 통합 인덱스)가 없습니다.")
+    else:
+        io_flags = faiss_mmap_flags(faiss)
+        index = faiss.read_index(str(bundle_dir / INDEX_FILE), io_flags)
+        if index.d != manifest["emb_dim"] or index.ntotal != manifest["index"]["ntotal"]:
+            raise BundleError("인덱스 차원/벡터 수가 manifest 와 다릅니다.")
+
+    load = lambda name: np.load(bundle_dir / name, mmap_mode="r")
+    closed_keys, closed_values = load(CLOSED_KEYS_FILE), load(CLOSED_VALUES_FILE)
+    summary_df = pd.DataFrame(np.asarray(closed_values), columns=CLOSED_COLUMNS)
+    summary_df.insert(0, "Index", np.asarray(closed_keys))
+
+    return {
+        "manifest": manifest,
+        "model_dir": bundle_dir / MODEL_DIR,
+        "index": index,
+        "shards": shards,
+        "meta": meta,
+        "ratings_keys": load(RATINGS_KEYS_FILE),
+        "ratings_values": load(RATINGS_VALUES_FILE),
+        "summary_df": summary_df,
+        "closure_risk": load_closure_risk(bundle_dir),
+    }
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ReVue 아티팩트 번들 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_prepare = sub.add_parser("prepare", help="모델·인덱스·메타·보조 테이블을 번들로 생성")
+    p_prepare.add_argument("--src", default=".", help="rag_faiss.index / meta.csv 등이 있는 디렉터리")
+    p_prepare.add_argument("--out", default="revue_bundle", help="번들 루트 디렉터리")
+    p_prepare.add_argument("--model", default=DEFAULT_EMB_MODEL, help="임베딩 모델 이름")
+    p_prepare.add_argument("--no-shards", action="store_true", help="구별 샤드 대신 통합 인덱스 하나로 저장")
+
+    p_verify = sub.add_parser("verify", help="번들 manifest 검증")
+    p_verify.add_argument("--bundle", default="revue_bundle", help="번들 루트 또는 버전 디렉터리")
+
+    args = parser.parse_args(argv)
+    if args.command == "prepare":
+        prepare_bundle(args.src, args.out, args.model, shards=not args.no_shards)
+    elif args.command == "verify":
+        bundle_dir = resolve_bundle_dir(args.bundle)
+        if bundle_dir is None:
+            raise SystemExit(f"❌ 번들을 찾을 수 없습니다: {args.bundle}")
+        manifest = verify_bundle(bundle_dir)
+        print(f"✅ 번들 검증 완료: {manifest['version']} ({manifest['rows']['meta']} rows, dim={manifest['emb_dim']})")
+
+
+if __name__ == "__main__":
+    main()
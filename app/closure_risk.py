@@ -0,0 +1,182 @@
+"""
+ReVue 폐점 위험도 — versus_closed.csv 분포 대비 매장·월별 위험 점수 사전 계산
+
+meta 전체를 NumPy 한 번으로 계산합니다.
+    z[i, j]   : 영업중 분포 기준 표준화 값 (폐점 평균 쪽으로 치우칠수록 +)
+    score[i]  : 지표별 효과 크기(|폐점-영업중| / 합동 표준편차)로 가중한 z 평균
+    pct[i]    : 전체 매장·월 중 score 의 백분위 (0~100, 클수록 위험)
+    weight[j] : 지표별 효과 크기 (score 가중치, 위험 요인 순위에도 사용)
+결과는 ENCODED_MCT·TA_YM 순으로 정렬된 배열로 저장하고, 키별 구간 dict 로 O(1) 조회합니다.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RISK_KEYS_FILE = "risk_keys.npy"
+RISK_YM_FILE = "risk_ym.npy"
+RISK_METRICS_FILE = "risk_metrics.npy"
+RISK_Z_FILE = "risk_z.npy"
+RISK_SCORE_FILE = "risk_score.npy"
+RISK_PCT_FILE = "risk_pct.npy"
+RISK_WEIGHT_FILE = "risk_weight.npy"
+
+
+def compute_closure_risk(meta, summary_df):
+    """meta 의 모든 매장·월을 폐점/영업중 분포와 비교해 위험도 배열 dict 반환 (계산 불가 시 None)"""
+    if summary_df.empty or "ENCODED_MCT" not in meta.columns:
+        return None
+    metrics = [m for m in summary_df["Index"].astype(str) if m in meta.columns]
+    if not metrics:
+        return None
+
+    stats = summary_df.set_index(summary_df["Index"].astype(str)).loc[metrics]
+    c_mean, o_mean = stats["Closed_mean"].to_numpy(float), stats["Open_mean"].to_numpy(float)
+    c_std, o_std = stats["Closed_std"].to_numpy(float), stats["Open_std"].to_numpy(float)
+
+    direction = np.sign(c_mean - o_mean)
+    pooled = np.sqrt((c_std ** 2 + o_std ** 2) / 2)
+    weight = np.abs(c_mean - o_mean) / np.where(pooled > 0, pooled, np.inf)
+
+    X = meta[metrics].apply(pd.to_numeric, errors="coerce").to_numpy(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (X - o_mean) / np.where(o_std > 0, o_std, np.nan) * direction
+        valid = ~np.isnan(z)
+        w_sum = (valid * weight).sum(axis=1)
+        score = np.where(w_sum > 0, np.nansum(z * weight, axis=1) / w_sum, np.nan)
+
+    # 백분위 (NaN 제외, 동점은 평균 순위 — 구간형 지표는 동점이 많음)
+    pct = np.full(len(score), np.nan)
+    ok = ~np.isnan(score)
+    if ok.sum() > 1:
+        ranks = pd.Series(score[ok]).rank(method="average").to_numpy()
+        pct[ok] = (ranks - 1) / (ok.sum() - 1) * 100
+    elif ok.any():
+        pct[ok] = 50.0
+
+    keys = meta["ENCODED_MCT"].astype(str).to_numpy(dtype="U")
+    if "TA_YM" in meta.columns:
+        ym = pd.to_numeric(meta["TA_YM"], errors="coerce").fillna(0).to_numpy("int32")
+    else:
+        ym = np.zeros(len(meta), dtype="int32")
+
+    order = np.lexsort((ym, keys))
+    return {
+        "keys": keys[order],
+        "ym": ym[order],
+        "metrics": np.array(metrics, dtype="U"),
+        "weight": weight.astype("float32"),
+        "z": z[order].astype("float32"),
+        "score": score[order].astype("float32"),
+        "pct": pct[order].astype("float32"),
+    }
+
+
+def save_closure_risk(arrays, out_dir):
+    out_dir = Path(out_dir)
+    np.save(out_dir / RISK_KEYS_FILE, arrays["keys"])
+    np.save(out_dir / RISK_YM_FILE, arrays["ym"])
+    np.save(out_dir / RISK_METRICS_FILE, arrays["metrics"])
+    np.save(out_dir / RISK_WEIGHT_FILE, arrays["weight"])
+    np.save(out_dir / RISK_Z_FILE, arrays["z"])
+    np.save(out_dir / RISK_SCORE_FILE, arrays["score"])
+    np.save(out_dir / RISK_PCT_FILE, arrays["pct"])
+    return len(arrays["keys"])
+
+
+def load_closure_risk(bundle_dir):
+    """번들에 저장된 위험도 배열을 mmap 으로 로드 (없으면 None)"""
+    bundle_dir = Path(bundle_dir)
+    if not (bundle_dir / RISK_KEYS_FILE).exists():
+        return None
+    load = lambda name: np.load(bundle_dir / name, mmap_mode="r")
+    metrics = load(RISK_METRICS_FILE)
+    # 가중치 파일이 없는 이전 번들은 균등 가중치로 대체
+    if (bundle_dir / RISK_WEIGHT_FILE).exists():
+        weight = load(RISK_WEIGHT_FILE)
+    else:
+        weight = np.ones(len(metrics), dtype="float32")
+    return {
+        "keys": load(RISK_KEYS_FILE),
+        "ym": load(RISK_YM_FILE),
+        "metrics": metrics,
+        "weight": weight,
+        "z": load(RISK_Z_FILE),
+        "score": load(RISK_SCORE_FILE),
+        "pct": load(RISK_PCT_FILE),
+    }
+
+
+def _num(v):
+    v = float(v)
+    return None if np.isnan(v) else round(v, 4)
+
+
+class ClosureRiskTable:
+    """ENCODED_MCT → 정렬 배열 구간 dict 로 매장별 위험도를 O(1) 조회"""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.metrics = [str(m) for m in arrays["metrics"]]
+        self.weight = np.nan_to_num(np.asarray(arrays["weight"], dtype=float))
+        keys = np.asarray(arrays["keys"])
+        uniq, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        self._spans = {
+            str(k): (int(s), int(s + c)) for k, s, c in zip(uniq, starts, counts)
+        }
+
+        # 매장별 점수가 있는 가장 최근 월 (모든 월이 NaN 이면 마지막 월)
+        positions = np.arange(len(keys))
+        valid_pos = np.where(np.isnan(np.asarray(arrays["score"], dtype=float)), -1, positions)
+        last_valid = np.maximum.reduceat(valid_pos, starts) if len(keys) else np.empty(0, dtype=int)
+        self._latest = {
+            str(k): int(v) if v >= s else int(s + c - 1)
+            for k, s, c, v in zip(uniq, starts, counts, last_valid)
+        }
+
+    def __contains__(self, encoded_mct):
+        return str(encoded_mct) in self._spans
+
+    def _row(self, i):
+        a = self.arrays
+        return {
+            "TA_YM": int(a["ym"][i]),
+            "score": _num(a["score"][i]),
+            "percentile": _num(a["pct"][i]),
+            "z": {m: _num(v) for m, v in zip(self.metrics, a["z"][i])},
+        }
+
+    def lookup(self, encoded_mct, history=False):
+        """점수가 있는 최신 월 위험도 (history=True 면 월별 전체 포함), 없으면 None"""
+        span = self._spans.get(str(encoded_mct))
+        if span is None:
+            return None
+        start, stop = span
+        result = {"ENCODED_MCT": str(encoded_mct), "latest": self._row(self._latest[str(encoded_mct)])}
+        if history:
+            result["history"] = [self._row(i) for i in range(start, stop)]
+        return result
+
+    def hint_lines(self, mct_list, max_lines=3, top_metrics=3):
+        """프롬프트용 매장별 위험 요약 (score 기여도 z × 효과 크기가 큰 지표 우선)"""
+        lines, seen = [], set()
+        for m in mct_list:
+            key = str(m)
+            if key in seen or key not in self._spans:
+                continue
+            seen.add(key)
+            i = self._latest[key]
+            score, pct = self.arrays["score"][i], self.arrays["pct"][i]
+            if np.isnan(score):
+                continue
+            z = np.asarray(self.arrays["z"][i], dtype=float)
+            contrib = np.nan_to_num(z * self.weight, nan=-np.inf)
+            top = [j for j in np.argsort(-contrib)[:top_metrics] if contrib[j] > 0]
+            drivers = ", ".join(f"{self.metrics[j]} z=+{z[j]:.1f}" for j in top) or "폐점 방향 지표 없음"
+            lines.append(
+                f"{key} ({int(self.arrays['ym'][i])}): 폐점 위험 지수 {score:+.2f} "
+                f"(위험 백분위 {pct:.0f}) — {drivers}"
+            )
+            if len(lines) >= max_lines:
+                break
+        return "\n".join(lines)
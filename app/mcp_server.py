@@ -1,24 +1,137 @@
-from fastapi import FastAPI
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from rag_gemini import generate_revue_answer
+from rag_gemini import generate_revue_answer, shard_router
+from report_parser import ReportParser, is_report
+from admission import (
+    AdmissionController, DeadlineExceeded, Overloaded, TIMEOUT_HEADER, deadline_from_request,
+)
+import store_api
+import mcp_tools
 import uvicorn
 import os
 
 app = FastAPI(title="ReVue MCP Server")
+admission = AdmissionController()
 
 class QueryRequest(BaseModel):
     query: str
+    timeout: Optional[float] = None  # 초 단위 (X-Request-Timeout 헤더가 우선)
+
+class RetrieveRequest(BaseModel):
+    query: str
+    fields: Optional[List[str]] = None
+    offset: int = 0
+    limit: int = 10
+
+class RevueReport(BaseModel):
+    """SYSTEM_PROMPT 출력 템플릿의 구조화 결과 (누락된 항목은 null)"""
+    traffic_light: Optional[str] = None
+    good_area: Optional[str] = None
+    bad_area: Optional[str] = None
+    summary: Optional[str] = None
+    Enhance_line: Optional[str] = None
+    Fix_line: Optional[str] = None
+    Shift_line: Optional[str] = None
+    recommended_path: Optional[str] = None
+    strategy_name: Optional[str] = None
+    core_idea: Optional[str] = None
+    reason: Optional[str] = None
+    action_plan: Optional[str] = None
+    expected_effect: Optional[str] = None
+    growth_phrase: Optional[str] = None
+
+def _run_search(query, deadline):
+    parser = ReportParser()
+    answer = generate_revue_answer(query, parser=parser, deadline=deadline)
+    report = RevueReport(**parser.close()) if is_report(answer) else None
+    return {"answer": answer, "report": report}
 
 @app.post("/search")
-def search(request: QueryRequest):
+async def search(request: QueryRequest, http_request: Request):
     try:
-        answer = generate_revue_answer(request.query)
-        return {"answer": answer}
+        deadline = deadline_from_request(http_request.headers.get(TIMEOUT_HEADER), request.timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        # ✅ 슬롯을 얻은 요청만 스레드풀에서 실행 (대기열 초과 시 즉시 429)
+        async with admission.slot(deadline):
+            return await run_in_threadpool(_run_search, request.query, deadline)
+    except Overloaded as e:
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except DeadlineExceeded as e:
+        print(f"⏱️ Deadline exceeded: {e.stage}")
+        return JSONResponse(status_code=504, content={"error": str(e)})
     except Exception as e:
         # Hugging Face 로그에서 확인하기 쉽게 에러 로그 출력
         print(f"❌ Error: {e}")
         return {"error": str(e)}
 
+# -------------------------------
+# 검색·조회 전용 엔드포인트 (LLM 호출 없음)
+# -------------------------------
+@app.post("/retrieve")
+def retrieve(request: RetrieveRequest):
+    try:
+        return store_api.search_stores(request.query, request.fields, request.offset, request.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/stores/{encoded_mct}")
+def store_detail(encoded_mct: str, fields: Optional[str] = None, offset: int = 0, limit: int = 12):
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        return store_api.get_store(encoded_mct, field_list, offset, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"매장을 찾을 수 없습니다: {encoded_mct}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/stores/{encoded_mct}/risk")
+def store_risk(encoded_mct: str, history: bool = False):
+    try:
+        return store_api.get_closure_risk(encoded_mct, history)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"위험도 데이터가 없습니다: {encoded_mct}")
+
+@app.get("/metrics")
+def metrics():
+    loaded = shard_router.loaded_districts() if shard_router is not None else None
+    return {**admission.metrics(), "loaded_shards": loaded}
+
+@app.get("/closure")
+def closure():
+    return store_api.closure_summary()
+
+# -------------------------------
+# MCP (JSON-RPC 2.0) 엔드포인트
+# -------------------------------
+@app.post("/mcp")
+async def mcp(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return mcp_tools.rpc_error(None, -32700, "Parse error")
+
+    # 도구 호출(임베딩·검색)은 블로킹 작업이므로 스레드풀에서 처리
+    if body == []:
+        return mcp_tools.rpc_error(None, -32600, "Invalid Request")  # 빈 배치는 JSON-RPC 오류
+    if isinstance(body, list):
+        replies = [r for r in [await run_in_threadpool(mcp_tools.handle_rpc, m) for m in body] if r is not None]
+    else:
+        replies = await run_in_threadpool(mcp_tools.handle_rpc, body)
+
+    if not replies:
+        return Response(status_code=202)  # notification 만 있는 경우
+    return replies
+
 # ✅ Hugging Face에서는 PORT 환경변수를 읽어서 실행해야 함
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 7860))
@@ -0,0 +1,137 @@
+"""
+ReVue MCP 도구 — Model Context Protocol(JSON-RPC 2.0) 요청 처리
+
+POST /mcp 로 들어온 initialize / tools/list / tools/call 요청을 처리합니다.
+검색·조회 도구는 store_api 를 그대로 호출하므로 LLM 비용이 들지 않습니다.
+"""
+import json
+
+import store_api
+
+PROTOCOL_VERSION = "2025-03-26"
+SERVER_INFO = {"name": "revue-mcp", "version": "1.0"}
+
+_FIELDS_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string"},
+    "description": "반환할 컬럼 목록 (생략 시 기본 컬럼, ['*'] 이면 전체)",
+}
+_OFFSET_SCHEMA = {"type": "integer", "minimum": 0, "default": 0}
+_LIMIT_SCHEMA = {"type": "integer", "minimum": 1, "maximum": store_api.MAX_LIMIT}
+
+TOOLS = [
+    {
+        "name": "retrieve_context",
+        "description": "질의와 유사한 성동구 매장 월별 데이터를 벡터 검색으로 찾아 점수와 함께 반환합니다.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "검색 질의 (주소·가게명 포함 권장)"},
+                "fields": _FIELDS_SCHEMA,
+                "offset": dict(_OFFSET_SCHEMA, maximum=store_api.MAX_SEARCH_DEPTH - 1),
+                "limit": dict(_LIMIT_SCHEMA, default=10),
+            },
+            "required": ["query"],
+        },
+    },
+    {
+        "name": "get_store",
+        "description": "ENCODED_MCT 로 매장의 월별 데이터와 구글맵 별점을 조회합니다.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "encoded_mct": {"type": "string", "description": "가맹점 코드 (ENCODED_MCT)"},
+                "fields": _FIELDS_SCHEMA,
+                "offset": _OFFSET_SCHEMA,
+                "limit": dict(_LIMIT_SCHEMA, default=12),
+            },
+            "required": ["encoded_mct"],
+        },
+    },
+    {
+        "name": "get_closure_risk",
+        "description": "ENCODED_MCT 매장의 사전 계산된 폐점 위험 지수(지표별 z 점수·종합 점수·백분위)를 반환합니다.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "encoded_mct": {"type": "string", "description": "가맹점 코드 (ENCODED_MCT)"},
+                "history": {"type": "boolean", "default": False, "description": "월별 이력 포함 여부"},
+            },
+            "required": ["encoded_mct"],
+        },
+    },
+    {
+        "name": "get_closure_summary",
+        "description": "폐점 매장과 영업중 매장의 지표별 평균·중앙값·표준편차 비교표를 반환합니다.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+]
+
+TOOL_NAMES = {tool["name"] for tool in TOOLS}
+
+
+def _call_tool(name, args):
+    if name == "retrieve_context":
+        return store_api.search_stores(
+            args["query"], args.get("fields"), args.get("offset", 0), args.get("limit", 10)
+        )
+    if name == "get_store":
+        return store_api.get_store(
+            args["encoded_mct"], args.get("fields"), args.get("offset", 0), args.get("limit", 12)
+        )
+    if name == "get_closure_risk":
+        return store_api.get_closure_risk(args["encoded_mct"], bool(args.get("history", False)))
+    return store_api.closure_summary()
+
+
+def _tool_result(payload, is_error=False):
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+    result = {"content": [{"type": "text", "text": text}], "isError": is_error}
+    if not is_error:
+        result["structuredContent"] = payload
+    return result
+
+
+def rpc_error(req_id, code, message):
+    return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+
+def handle_rpc(message):
+    """JSON-RPC 메시지 하나를 처리 (notification 이면 None 반환)"""
+    if not isinstance(message, dict):
+        return rpc_error(None, -32600, "Invalid Request")
+    req_id = message.get("id")
+    method = message.get("method")
+    params = message.get("params") or {}
+
+    if "id" not in message:
+        return None  # notifications/initialized 등은 응답하지 않음
+    if not isinstance(params, dict):
+        return rpc_error(req_id, -32602, "Invalid params: params must be an object")
+
+    if method == "initialize":
+        result = {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": SERVER_INFO,
+        }
+    elif method == "ping":
+        result = {}
+    elif method == "tools/list":
+        result = {"tools": TOOLS}
+    elif method == "tools/call":
+        name = params.get("name")
+        if name not in TOOL_NAMES:
+            return rpc_error(req_id, -32602, f"Unknown tool: {name}")
+        arguments = params.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            return rpc_error(req_id, -32602, "Invalid params: arguments must be an object")
+        try:
+            result = _tool_result(_call_tool(name, arguments))
+        except (KeyError, ValueError, TypeError) as e:
+            # 도구 실행 오류는 프로토콜 오류가 아닌 isError 결과로 전달
+            result = _tool_result(f"{type(e).__name__}: {e}", is_error=True)
+    else:
+        return rpc_error(req_id, -32601, f"Method not found: {method}")
+
+    return {"jsonrpc": "2.0", "id": req_id, "result": result}
@@ -1,19 +1,34 @@
 from pathlib import Path
 import os
+import re
 import faiss
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 import google.generativeai as genai
 import numpy as np 
+from bundle import resolve_bundle_dir, enable_offline_mode, load_bundle
+from closure_risk import ClosureRiskTable, compute_closure_risk
+from admission import DeadlineExceeded
+from google.api_core import exceptions as google_exceptions
 
 # -------------------------------
 # 경로 설정
 # -------------------------------
-# ✅ 안전한 캐시 경로로 변경
-CACHE_DIR = Path("/tmp/huggingface_cache")
-os.makedirs(CACHE_DIR, exist_ok=True)
-os.environ["HF_HOME"] = str(CACHE_DIR)
+# ✅ 번들(python bundle.py prepare)이 있으면 번들만 사용 — 네트워크 접근 없음
+BUNDLE_ROOT = os.environ.get("REVUE_BUNDLE_DIR", "revue_bundle")
+BUNDLE_VERIFY = os.environ.get("REVUE_BUNDLE_VERIFY", "size")  # 'size' | 'sha256' (전체 해시는 빌드 시 verify)
+USE_SHARDS = os.environ.get("REVUE_USE_SHARDS", "1") != "0"  # 구별 샤드 검색 사용 여부
+BUNDLE_DIR = resolve_bundle_dir(BUNDLE_ROOT)
+
+if BUNDLE_DIR is not None:
+    enable_offline_mode()  # sentence_transformers import 전에 설정해야 적용됨
+else:
+    # ✅ 안전한 캐시 경로로 변경
+    CACHE_DIR = Path("/tmp/huggingface_cache")
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    os.environ["HF_HOME"] = str(CACHE_DIR)
+
+from sentence_transformers import SentenceTransformer
 
 ARTIFACTS_DIR = os.getcwd()
 OUT_DIR = "."       # ✅ 현재 디렉토리 기준으로 변경
@@ -38,23 +53,67 @@ except Exception as e:
     print(f"⚠️ WARNING: Gemini initialization failed: {e}")
 
 # -------------------------------
-# 인덱스 및 메타 불러오기
+# 인덱스·메타·보조 테이블 불러오기
 # -------------------------------
-index = faiss.read_index(os.path.join(OUT_DIR, "rag_faiss.index"))
-meta = pd.read_csv(os.path.join(OUT_DIR, "meta.csv"))
+if BUNDLE_DIR is not None:
+    # ✅ manifest 검증 후 mmap 로드 (CSV 재파싱 없음)
+    bundle = load_bundle(BUNDLE_DIR, verify=BUNDLE_VERIFY, use_shards=USE_SHARDS)
+    manifest = bundle["manifest"]
+    print(f"📦 번들 로드: {manifest['version']} ({BUNDLE_DIR})")
+
+    EMB_MODEL = manifest["emb_model"]
+    index = bundle["index"]
+    shard_router = bundle["shards"]  # 샤드가 있으면 index 는 None
+    index_dim, index_ntotal = manifest["emb_dim"], manifest["index"]["ntotal"]
+    meta = bundle["meta"]
+    model = SentenceTransformer(str(bundle["model_dir"]), device="cpu")
+
+    summary_df = bundle["summary_df"]
+    risk_arrays = bundle["closure_risk"]
+    rating_map = {
+        str(k): (float(v[0]), float(v[1]))
+        for k, v in zip(bundle["ratings_keys"], bundle["ratings_values"])
+    }
+else:
+    print(f"⚠️ 번들 없음({BUNDLE_ROOT}) — 현재 디렉터리의 원본 파일을 사용합니다.")
+    index = faiss.read_index(os.path.join(OUT_DIR, "rag_faiss.index"))
+    shard_router = None
+    index_dim, index_ntotal = index.d, index.ntotal
+    meta = pd.read_csv(os.path.join(OUT_DIR, "meta.csv"))
+
+    # ✅ 모델 캐시 디렉터리 지정
+    model = SentenceTransformer(EMB_MODEL, device="cpu", cache_folder=str(CACHE_DIR))
+
+    # === 폐점 데이터 ===
+    if os.path.exists("versus_closed.csv"):
+        summary_df = pd.read_csv("versus_closed.csv", encoding="utf-8-sig")
+    else:
+        summary_df = pd.DataFrame()
+
+    # === 별점 데이터 ===
+    if os.path.exists("store_google_rating.csv"):
+        ratings = pd.read_csv("store_google_rating.csv", encoding="utf-8-sig")
+        ratings = ratings[["ENCODED_MCT", "g_rating", "g_user_ratings_total"]]
+        ratings["ENCODED_MCT"] = ratings["ENCODED_MCT"].astype(str)
+        rating_map = dict(zip(ratings["ENCODED_MCT"], zip(ratings["g_rating"], ratings["g_user_ratings_total"])))
+    else:
+        rating_map = {}
 
-# ✅ 모델 캐시 디렉터리 지정
-model = SentenceTransformer(EMB_MODEL, device="cpu", cache_folder=str(CACHE_DIR))
+    risk_arrays = None
 
-# -------------------------------
-# 추가 데이터 불러오기
-# -------------------------------
+# === 폐점 위험도 (번들에 없으면 시작 시 한 번 계산) ===
+if risk_arrays is None:
+    risk_arrays = compute_closure_risk(meta, summary_df)
+closure_risk = ClosureRiskTable(risk_arrays) if risk_arrays is not None else None
 
-# === 폐점 데이터 ===
-if os.path.exists("versus_closed.csv"):
-    summary_df = pd.read_csv("versus_closed.csv", encoding="utf-8-sig")
-else:
-    summary_df = pd.DataFrame()
+# 임베딩 차원 확인
+EMB_DIM = model.get_sentence_embedding_dimension()
+if index_dim != EMB_DIM or index_ntotal != len(meta):
+    raise RuntimeError(
+        f"인덱스/메타 불일치: index.d={index_dim}, model dim={EMB_DIM}, "
+        f"index.ntotal={index_ntotal}, meta rows={len(meta)}"
+    )
+print(f"✅ Embedding model ready: {EMB_MODEL} (dim={EMB_DIM})")
 
 def build_closure_hints(summary_df, max_lines=3):
     """폐점/영업중 평균 비교 데이터를 간결한 문자열 요약으로 변환 (LLM 참고용 힌트)"""
@@ -71,15 +130,6 @@ def build_closure_hints(summary_df, max_lines=3):
             break
     return "\n".join(hints)
 
-# === 별점 데이터 ===
-if os.path.exists("store_google_rating.csv"):
-    ratings = pd.read_csv("store_google_rating.csv", encoding="utf-8-sig")
-    ratings = ratings[["ENCODED_MCT", "g_rating", "g_user_ratings_total"]]
-    ratings["ENCODED_MCT"] = ratings["ENCODED_MCT"].astype(str)
-    rating_map = dict(zip(ratings["ENCODED_MCT"], zip(ratings["g_rating"], ratings["g_user_ratings_total"])))
-else:
-    rating_map = {}
-
 def build_rating_summary(mct_list, max_lines=None):
     """구글맵 별점 데이터 요약"""
     seen, lines = set(), []
@@ -103,28 +153,25 @@ def build_rating_summary(mct_list, max_lines=None):
             break
     return "\n".join(lines) if lines else "별점 요약 데이터 없음"
 
-
-# SentenceTransformer 모델 로드
-try:
-    print(f"Loading embedding model: {EMB_MODEL} to cache folder: {CACHE_DIR}")
-    # cache_folder 인자를 사용하지만, 환경 변수(HF_HOME)가 우선합니다.
-    print("Embedding model loaded successfully.")
-    EMB_DIM = model.get_sentence_embedding_dimension()
-except Exception as e:
-    print(f"Error loading SentenceTransformer model: {e}")
-    raise RuntimeError(f"Failed to load SentenceTransformer: {e}")
-
-# 임베딩 차원 확인
-EMB_DIM = model.get_sentence_embedding_dimension()
-
 # -------------------------------
 # 검색 함수
 # -------------------------------
-def retrieve_context(query, top_k=TOP_K):
+def retrieve_context(query, top_k=TOP_K, deadline=None):
+    if deadline is not None:
+        deadline.check("encode")
     q_emb = model.encode([query], normalize_embeddings=True)
-    D, I = index.search(np.array(q_emb, dtype="float32"), top_k)
-    ctx = meta.iloc[I[0]].copy()
-    ctx["score"] = D[0]
+    if deadline is not None:
+        deadline.check("search")
+    q_emb = np.array(q_emb, dtype="float32")
+    if shard_router is not None:
+        # ✅ 질의에서 구를 판별해 해당 샤드만 검색 (판별 실패 시 전 샤드 병렬 검색)
+        D, I = shard_router.search(q_emb, top_k, shard_router.route(query))
+    else:
+        D, I = index.search(q_emb, top_k)
+    # top_k 가 인덱스 크기보다 크면 FAISS 가 -1 로 채우므로 제외
+    found = I[0] >= 0
+    ctx = meta.iloc[I[0][found]].copy()
+    ctx["score"] = D[0][found]
     return ctx
 
 # -------------------------------
@@ -260,15 +307,17 @@ ReVue — 데이터를 길로 바꾸는 마케팅 네비게이션
 # ----------------------------
 # 🧠 질의 수행 함수
 # ----------------------------
-def generate_revue_answer(user_query, mct_list=None):
+def generate_revue_answer(user_query, mct_list=None, parser=None, deadline=None):
     """
     RAG + 폐점 힌트 + 별점 데이터를 함께 반영한 질의 응답
     - 주소 자동 감지 및 필터링 강화 (공백, 띄어쓰기 불일치 포함)
     - 잘못된 fallback 제거 (불필요한 구 단위 재검색 X)
+    - parser(ReportParser)가 주어지면 스트리밍 응답을 받으며 보고서를 바로 파싱
+    - deadline(admission.Deadline)이 주어지면 임베딩·검색·LLM 단계마다 확인하고 초과 시 중단
     """
 
     # 1️⃣ RAG 검색
-    ctx_df = retrieve_context(user_query, top_k=TOP_K)
+    ctx_df = retrieve_context(user_query, top_k=TOP_K, deadline=deadline)
     ctx_df_all = ctx_df.copy()  # 원본 백업 (필터 실패 시 전체 유지용)
 
     # (validation) RAG 검색 결과 확인
@@ -281,7 +330,7 @@ def generate_revue_answer(user_query, mct_list=None):
 
     # 1.5️⃣ 주소 자동 감지 및 필터링
     # 숫자 없어도 감지 가능 (ex. '왕십리로', '왕십리길')
-    addr_pattern = r"((서울(?:특별시)?\s*)?(성동구\s*)?[가-힣A-Za-z0-9]+(\s*\d+|\s*(로|길|대로|대|가|나|다|라|마|바|사|아|자|차|카|타|파|하))\s*\d*)"
+    addr_pattern = r"((서울(?:특별시)?\s*)?([가-힣]{1,4}구\s*)?[가-힣A-Za-z0-9]+(\s*\d+|\s*(로|길|대로|대|가|나|다|라|마|바|사|아|자|차|카|타|파|하))\s*\d*)"
     addr_match = re.search(addr_pattern, user_query)  # ✅ 질의문에서 주소 감지
 
     if addr_match:
@@ -313,12 +362,16 @@ def generate_revue_answer(user_query, mct_list=None):
     # 🔧 필터링 이후 문맥 재구성
     context_text = "\n\n".join(ctx_df["rag_text"].head(10))
 
-    # 3️⃣ 폐점 힌트
+    # 3️⃣ 폐점 힌트 (검색된 매장별 위험도 + 전체 분포 비교)
     closure_hints = (
         build_closure_hints(summary_df, max_lines=3)
         if not summary_df.empty
         else "폐점 데이터 없음"
     )
+    if closure_risk is not None and "ENCODED_MCT" in ctx_df.columns:
+        risk_hints = closure_risk.hint_lines(ctx_df["ENCODED_MCT"], max_lines=3)
+        if risk_hints:
+            closure_hints = f"{risk_hints}\n{closure_hints}"
 
     # 4️⃣ 별점 요약
     rating_summary = (
@@ -341,14 +394,41 @@ def generate_revue_answer(user_query, mct_list=None):
 """
 
     # 6️⃣ LLM 호출 + 디버그 출력
-    response = llm.generate_content(full_prompt)
+    if parser is None and deadline is None:
+        answer = llm.generate_content(full_prompt).text
+    else:
+        request_options = None
+        if deadline is not None:
+            deadline.check("llm")
+            request_options = {"timeout": deadline.remaining()}
+        chunks = []
+        try:
+            for chunk in llm.generate_content(full_prompt, stream=True, request_options=request_options):
+                if deadline is not None:
+                    deadline.check("llm")  # 마감 초과 시 스트림 수신 중단
+                # 종료 사유·메타데이터만 담긴 청크는 text/parts 접근 시 ValueError — candidates 를 직접 확인
+                if not (chunk.candidates and chunk.candidates[0].content.parts):
+                    continue
+                text = chunk.text
+                chunks.append(text)
+                if parser is not None:
+                    parser.feed(text)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # request_options timeout 은 google-api-core/전송 계층 예외로 올라오므로 마감 초과로 변환
+            timed_out = isinstance(e, (google_exceptions.DeadlineExceeded, TimeoutError))
+            if deadline is not None and (timed_out or deadline.remaining() <= 0):
+                raise DeadlineExceeded("llm") from e
+            raise
+        answer = "".join(chunks)
     #print("=== CONTEXT TEXT 미리보기 ===")
     #print(context_text[:3000]) 
     #print(rating_summary[:500])  # 500자까지만 미리보기
     #print("==================================")
-    print(response.text)
+    print(answer)
 
-    return response.text
+    return answer
 
 # -------------------------------
 # 실행 예시
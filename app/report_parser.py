@@ -0,0 +1,121 @@
+"""
+ReVue 보고서 파서 — SYSTEM_PROMPT 출력 템플릿을 구조화된 dict 로 변환
+
+LLM 텍스트를 줄 단위로 한 번만 훑으며(single-pass) 섹션 마커를 만나면 해당 필드로 전환합니다.
+스트리밍 응답도 feed() 로 청크를 넣으면 완성된 줄부터 바로 처리됩니다.
+"""
+import re
+
+REPORT_START = "===== 📍 현재 위치 파악 ====="
+
+REPORT_FIELDS = [
+    # [현재 위치 파악]
+    "traffic_light", "good_area", "bad_area", "summary",
+    # [경로 탐색]
+    "Enhance_line", "Fix_line", "Shift_line",
+    # [최종 경로]
+    "recommended_path", "strategy_name", "core_idea", "reason",
+    # [운행 안내]
+    "action_plan", "expected_effect",
+    # [도착 알림]
+    "growth_phrase",
+]
+
+# 첫 줄만 값으로 취하는 필드 (나머지는 다음 마커까지 여러 줄 누적)
+SINGLE_LINE_FIELDS = {"traffic_light", "recommended_path", "strategy_name", "core_idea", "reason"}
+
+# (필드명, 마커 정규식) — 줄 앞부분의 '-', '•', '#', '**', 목록 번호(1. / 2)) 를 제거한 뒤 매칭
+_MARKERS = [
+    ("traffic_light", r"🚦\s*신호등\s*[:：]?"),
+    ("good_area", r"🚗\s*잘 가고 있는 구간"),
+    ("bad_area", r"⚠️?\s*느리게 가고 있는 구간"),
+    ("summary", r"🎯\s*한줄요약\s*[:：]?"),
+    ("Enhance_line", r"(?:강화|유지) 경로\s*\((?:Enhance|Keep) Line\)\s*[:：]?"),
+    ("Fix_line", r"보수 경로\s*\(Fix Line\)\s*[:：]?"),
+    ("Shift_line", r"전환 경로\s*\(Shift Line\)\s*[:：]?"),
+    ("recommended_path", r"추천 경로\s*[:：]"),
+    ("strategy_name", r"전략명\s*[:：]"),
+    ("core_idea", r"핵심 아이디어\s*[:：]"),
+    ("reason", r"채택 근거\s*[:：]"),
+    ("action_plan", r"<실행 방법>"),
+    ("expected_effect", r"<기대효과>"),
+]
+# 마커 앞의 장식용 이모지·기호(🔹, ▶ 등)는 최대 4글자까지 건너뜀
+_MARKER_RE = re.compile(
+    r"[^\w\s<]{0,4}?\s*(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in _MARKERS) + ")"
+)
+_GROWTH_RE = re.compile(r"🎉\s*오늘 사장님은\s*[“\"](.*?)[”\"]")
+_LEAD_RE = re.compile(r"^(?:[\s\-•#*>]+|\d+[.)](?!\d))*")
+_HEADING_RE = re.compile(r"^[\s#>]+")
+_RULE_RE = re.compile(r"^(?:-{3,}|\*{3,}|_{3,})$")
+
+
+class ReportParser:
+    """청크 단위로 입력받아 보고서 필드를 점진적으로 채우는 파서"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._field = None
+        self._lines = {name: [] for name in REPORT_FIELDS}
+
+    def feed(self, chunk):
+        """텍스트 청크 추가 — 줄바꿈으로 완성된 줄만 처리하고 나머지는 버퍼에 보관"""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._consume(line)
+        return self
+
+    def close(self):
+        """남은 버퍼를 처리하고 최종 보고서를 반환"""
+        if self._buffer:
+            self._consume(self._buffer)
+            self._buffer = ""
+        self._field = None
+        return self.snapshot()
+
+    def snapshot(self):
+        """현재까지 파싱된 필드 (값이 없으면 None)"""
+        return {
+            name: ("\n".join(lines).strip() or None)
+            for name, lines in self._lines.items()
+        }
+
+    def _consume(self, line):
+        line = line.rstrip("\r")
+
+        # 섹션 구분선(=====, ---) — 제목 기호(#)만 지운 줄로 판단하고('-' 는 유지) 진행 중인 필드 종료
+        raw = _HEADING_RE.sub("", line).strip()
+        if raw.startswith("=====") or _RULE_RE.match(raw):
+            self._field = None
+            return
+
+        head = _LEAD_RE.sub("", line.replace("**", "")).strip()
+
+        growth = _GROWTH_RE.search(head)
+        if growth:
+            self._lines["growth_phrase"] = [growth.group(1).strip()]
+            self._field = None
+            return
+
+        m = _MARKER_RE.match(head)
+        if m:
+            self._field = m.lastgroup
+            self._lines[self._field] = []
+            rest = head[m.end():].strip()
+            if rest:
+                self._append(rest)
+            return
+
+        if self._field and (line.strip() or self._lines[self._field]):
+            self._append(line.strip() if self._field in SINGLE_LINE_FIELDS else line.rstrip())
+
+    def _append(self, text):
+        self._lines[self._field].append(text)
+        if self._field in SINGLE_LINE_FIELDS:
+            self._field = None
+
+
+def is_report(text):
+    """SYSTEM_PROMPT 보고서 형식의 응답인지 확인"""
+    return REPORT_START in text
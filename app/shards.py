@@ -0,0 +1,172 @@
+"""
+ReVue 구(區) 단위 샤드 인덱스 — 질의에서 구를 찾아 해당 샤드만 검색
+
+번들 생성 시 meta 의 주소([ADDR=...] 또는 MCT_BSE_AR)에서 구를 추출해
+구별 FAISS 인덱스(shards/shard_XX/)와 도로명 → 구 주소 색인(shards.json)을 만듭니다.
+서버는 샤드를 처음 검색할 때 디스크에서 열기 때문에(lazy) 상주 메모리가 사용 중인 구에 비례합니다.
+구를 특정할 수 없는 질의는 모든 샤드를 병렬 검색한 뒤 k-way 병합합니다.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import heapq
+import itertools
+import json
+import re
+import threading
+
+import numpy as np
+
+SHARDS_DIR = "shards"
+SHARDS_INDEX_FILE = "shards.json"
+UNKNOWN_DISTRICT = "기타"
+
+_ADDR_RE = re.compile(r"\[ADDR=([^\]]+)\]")
+_GU_RE = re.compile(r"(?:^|\s)(?:서울(?:특별시)?\s*)?([가-힣]{1,4}구)(?=\s|$)")
+_ROAD_RE = re.compile(r"[가-힣A-Za-z0-9]+?(?:대로|로|길)(?:\d+(?:가|나|다|라|마|바|사|아)?길)?")
+_ROAD_BASE_RE = re.compile(r"^([가-힣]+?(?:대로|로))")
+
+
+def row_addresses(meta):
+    """meta 행별 주소 문자열 (MCT_BSE_AR 컬럼 우선, 없으면 rag_text 의 [ADDR=...])"""
+    if "MCT_BSE_AR" in meta.columns:
+        return meta["MCT_BSE_AR"].fillna("").astype(str)
+    return meta["rag_text"].astype(str).str.extract(_ADDR_RE)[0].fillna("").str.strip()
+
+
+def district_of(address):
+    m = _GU_RE.search(address)
+    return m.group(1) if m else UNKNOWN_DISTRICT
+
+
+def faiss_mmap_flags(faiss):
+    """IndexFlat 도 mmap 되도록 IO_FLAG_MMAP_IFC 사용 (IO_FLAG_MMAP 은 IVF 리스트에만 적용됨)"""
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", getattr(faiss, "IO_FLAG_MMAP", 0))
+    return mmap_flag | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+
+
+def _road_tokens(text):
+    """어절별 도로명 토큰 (전체 토큰과 '…로'/'…대로' 기본 도로명 모두 포함)"""
+    tokens = set()
+    for word in text.split():
+        for token in _ROAD_RE.findall(word):
+            tokens.add(token)
+            base = _ROAD_BASE_RE.match(token)
+            if base:
+                tokens.add(base.group(1))
+    return tokens
+
+
+# -------------------------------
+# 샤드 생성 (번들 prepare 단계)
+# -------------------------------
+def build_shards(index, meta, out_dir):
+    """원본 인덱스의 벡터를 구별로 나눠 저장하고 {구: 행 수} 반환"""
+    import faiss
+
+    out_dir = Path(out_dir) / SHARDS_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    addresses = row_addresses(meta)
+    districts = addresses.map(district_of).to_numpy()
+    vectors = index.reconstruct_n(0, index.ntotal)
+
+    entries, roads = {}, {}
+    for i, gu in enumerate(sorted(set(districts))):
+        rows = np.flatnonzero(districts == gu).astype("int64")
+        shard = faiss.IndexFlat(index.d, index.metric_type)
+        shard.add(vectors[rows])
+
+        name = f"shard_{i:02d}"
+        (out_dir / name).mkdir(exist_ok=True)
+        faiss.write_index(shard, str(out_dir / name / "index.faiss"))
+        np.save(out_dir / name / "rows.npy", rows)
+        entries[gu] = {"dir": name, "rows": len(rows)}
+
+        for addr in addresses.iloc[rows].unique():
+            for token in _road_tokens(addr):
+                roads.setdefault(token, set()).add(gu)
+
+    with open(out_dir / SHARDS_INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "metric": int(index.metric_type),
+                "districts": entries,
+                "roads": {k: sorted(v) for k, v in sorted(roads.items())},
+            },
+            f,
+            ensure_ascii=False,
+        )
+    return {gu: e["rows"] for gu, e in entries.items()}
+
+
+# -------------------------------
+# 샤드 라우팅 및 검색
+# -------------------------------
+class ShardRouter:
+    """질의 → 구 판별 후 해당 샤드만 검색, 미판별 시 전 샤드 병렬 검색 + k-way 병합"""
+
+    def __init__(self, bundle_dir, max_workers=8):
+        import faiss
+
+        self._faiss = faiss
+        self.root = Path(bundle_dir) / SHARDS_DIR
+        with open(self.root / SHARDS_INDEX_FILE, encoding="utf-8") as f:
+            info = json.load(f)
+        self.districts = info["districts"]
+        self.roads = info["roads"]
+        self.higher_is_better = info["metric"] == faiss.METRIC_INNER_PRODUCT
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.districts))))
+
+        names = sorted((g for g in self.districts if g != UNKNOWN_DISTRICT), key=len, reverse=True)
+        self._gu_re = re.compile("|".join(map(re.escape, names))) if names else None
+
+    def loaded_districts(self):
+        return list(self._loaded)
+
+    def _shard(self, gu):
+        """샤드 인덱스·행 번호를 처음 사용할 때 디스크에서 mmap 으로 연다"""
+        shard = self._loaded.get(gu)
+        if shard is None:
+            with self._lock:
+                shard = self._loaded.get(gu)
+                if shard is None:
+                    path = self.root / self.districts[gu]["dir"]
+                    index = self._faiss.read_index(str(path / "index.faiss"), faiss_mmap_flags(self._faiss))
+                    rows = np.load(path / "rows.npy", mmap_mode="r")
+                    shard = self._loaded[gu] = (index, rows)
+                    print(f"🗂️ 샤드 로드: {gu} ({len(rows)}건)")
+        return shard
+
+    def route(self, query):
+        """질의에서 구 이름 → 도로명 주소 색인 순으로 대상 구 목록을 찾고, 없으면 None"""
+        if self._gu_re is not None:
+            found = sorted(set(self._gu_re.findall(query)))
+            if found:
+                return found
+        found = set()
+        for token in _road_tokens(query):
+            found.update(self.roads.get(token, ()))
+        return sorted(found) or None
+
+    def _search_one(self, gu, q_emb, top_k):
+        index, rows = self._shard(gu)
+        D, I = index.search(q_emb, min(top_k, index.ntotal))
+        return [(float(d), int(rows[i])) for d, i in zip(D[0], I[0]) if i >= 0]
+
+    def search(self, q_emb, top_k, districts=None):
+        """index.search 와 같은 (D, I) 형태로 반환 (I 는 meta 전체 기준 행 번호)"""
+        targets = [g for g in (districts or self.districts) if g in self.districts]
+        if len(targets) == 1:
+            hits_per_shard = [self._search_one(targets[0], q_emb, top_k)]
+        else:
+            hits_per_shard = list(self._pool.map(lambda g: self._search_one(g, q_emb, top_k), targets))
+
+        sign = -1.0 if self.higher_is_better else 1.0
+        merged = list(itertools.islice(
+            heapq.merge(*hits_per_shard, key=lambda hit: sign * hit[0]), top_k
+        ))
+        D = np.array([[d for d, _ in merged]], dtype="float32")
+        I = np.array([[i for _, i in merged]], dtype="int64")
+        return D, I
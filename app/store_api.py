@@ -0,0 +1,99 @@
+"""
+ReVue 데이터 조회 API — LLM 호출 없이 검색 결과·매장 데이터를 반환
+
+REST 엔드포인트(/retrieve, /stores/{ENCODED_MCT})와 MCP 도구가 함께 사용합니다.
+"""
+import json
+
+import pandas as pd
+
+from rag_gemini import retrieve_context, meta, rating_map, summary_df, closure_risk
+
+MAX_LIMIT = 100
+MAX_SEARCH_DEPTH = 1000  # 검색 결과 페이지 offset + limit 상한 (FAISS top_k)
+DEFAULT_FIELDS = ["ENCODED_MCT", "TA_YM", "rag_text"]
+
+# ENCODED_MCT → meta 행 위치 (매장별 월 데이터 O(1) 조회)
+if "ENCODED_MCT" in meta.columns:
+    store_rows = meta.groupby(meta["ENCODED_MCT"].astype(str), sort=False).indices
+else:
+    store_rows = {}
+
+
+def _to_records(df):
+    """numpy 타입·NaN 을 JSON 호환 값으로 변환"""
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+
+def _project(df, fields):
+    """필드 선택 (None 이면 DEFAULT_FIELDS 중 존재하는 컬럼, ['*'] 이면 전체)"""
+    if fields is None:
+        return df[[c for c in DEFAULT_FIELDS if c in df.columns]]
+    if list(fields) == ["*"]:
+        return df
+    unknown = [f for f in fields if f not in df.columns]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+    return df[list(fields)]
+
+
+def _check_page(offset, limit):
+    if offset < 0 or not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"offset 은 0 이상, limit 은 1~{MAX_LIMIT} 범위여야 합니다.")
+
+
+def _rating(encoded_mct):
+    pair = rating_map.get(str(encoded_mct))
+    if pair is None or any(pd.isna(v) for v in pair):
+        return None
+    return {"g_rating": float(pair[0]), "g_user_ratings_total": int(pair[1])}
+
+
+def search_stores(query, fields=None, offset=0, limit=10):
+    """벡터 검색 결과를 점수와 함께 페이지 단위로 반환"""
+    _check_page(offset, limit)
+    if offset + limit > MAX_SEARCH_DEPTH:
+        raise ValueError(f"offset + limit 은 {MAX_SEARCH_DEPTH} 이하여야 합니다.")
+    ctx = retrieve_context(query, top_k=min(offset + limit, len(meta)))
+    ctx = ctx.iloc[offset:offset + limit]
+    scores = ctx["score"].astype(float).tolist()
+    hits = _to_records(_project(ctx.drop(columns="score"), fields))
+    for rank, (hit, score) in enumerate(zip(hits, scores), start=offset + 1):
+        hit["rank"], hit["score"] = rank, score
+    return {"query": query, "offset": offset, "limit": limit, "hits": hits}
+
+
+def get_store(encoded_mct, fields=None, offset=0, limit=12):
+    """매장 한 곳의 월별 데이터·별점·최신 폐점 위험도 (없는 매장이면 KeyError)"""
+    _check_page(offset, limit)
+    key = str(encoded_mct)
+    positions = store_rows.get(key)
+    rating = _rating(key)
+    if positions is None and rating is None:
+        raise KeyError(key)
+
+    risk = closure_risk.lookup(key) if closure_risk is not None else None
+    rows = meta.iloc[positions] if positions is not None else meta.iloc[0:0]
+    page = rows.iloc[offset:offset + limit]
+    return {
+        "ENCODED_MCT": key,
+        "rating": rating,
+        "closure_risk": risk["latest"] if risk else None,
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "rows": _to_records(_project(page, fields)),
+    }
+
+
+def get_closure_risk(encoded_mct, history=False):
+    """사전 계산된 매장 폐점 위험도 (위험도 데이터가 없거나 없는 매장이면 KeyError)"""
+    result = closure_risk.lookup(encoded_mct, history=history) if closure_risk is not None else None
+    if result is None:
+        raise KeyError(str(encoded_mct))
+    return result
+
+
+def closure_summary():
+    """폐점/영업중 매장 지표 비교 테이블"""
+    return {"metrics": _to_records(summary_df)}